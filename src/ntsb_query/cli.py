@@ -0,0 +1,542 @@
+"""
+Command-line bulk query runner for the NTSB CAROL database.
+
+Query specifications are read either from a JSONL file (one object per line
+whose keys are `NTSBSearchModel` fields) or from command-line flags. Each query
+is paginated through the API by a pool of worker threads and the matching
+records are streamed as JSON lines to stdout, a single file, or one file per
+query. Progress (query index and page offset) can be checkpointed to a file so
+an interrupted run resumes where it stopped.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+import httpx
+
+from .query import NTSBSearchModel, NTSBSearchTool
+
+
+def load_specs(stream: TextIO) -> List[Dict[str, Any]]:
+    """
+    Reads query specifications from a JSONL stream.
+
+    Blank lines are skipped.
+
+    Args:
+        stream: A text stream with one JSON object per line.
+
+    Returns:
+        The list of query specifications, in file order.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    specs = []
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            spec = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Error: Invalid JSON on line {line_no}: {exc}") from exc
+        if not isinstance(spec, dict):
+            raise ValueError(f"Error: Line {line_no} is not a JSON object.")
+        specs.append(spec)
+    return specs
+
+
+def parse_spec(spec: Dict[str, Any]) -> NTSBSearchModel:
+    """
+    Validates a query specification and converts it to search parameters.
+
+    Args:
+        spec: A dictionary whose keys are `NTSBSearchModel` fields.
+
+    Returns:
+        The validated search parameters.
+
+    Raises:
+        ValueError: If the specification has unknown fields, no search
+                    criteria, or values Pydantic rejects.
+    """
+    unknown = sorted(set(spec) - set(NTSBSearchModel.model_fields))
+    if unknown:
+        raise ValueError(f"Error: Unknown search field(s): {', '.join(unknown)}.")
+    # Same rule as NTSBSearchTool._run
+    if not any(spec.values()):
+        raise ValueError("Error: No valid search criteria provided to form a query.")
+    return NTSBSearchModel(**spec)
+
+
+class Checkpoint:
+    """
+    Persists per-query pagination progress to a JSON file.
+
+    The file records, for each query index, the offset of the next page to
+    fetch and whether the query is complete. It is rewritten atomically after
+    every page, so it is always consistent even if the process is killed.
+    A fingerprint of the query specifications and of `fetch_all` guards against
+    resuming with a different set of queries, or skipping queries completed
+    under `max_results` when every record is now requested.
+    """
+
+    def __init__(self, path: str, specs: List[Dict[str, Any]], fetch_all: bool = False):
+        """
+        Loads the checkpoint at `path`, or starts a new one if it is missing.
+
+        Args:
+            path: Location of the checkpoint file.
+            specs: The query specifications of the current run.
+            fetch_all: Whether the current run ignores `max_results`.
+
+        Raises:
+            ValueError: If the checkpoint was written for different queries
+                        or a different `fetch_all` setting.
+        """
+        self.path = path
+        self.fingerprint = hashlib.sha256(
+            json.dumps({"specs": specs, "fetch_all": fetch_all}, sort_keys=True).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("fingerprint") != self.fingerprint:
+                raise ValueError(
+                    f"Error: Checkpoint '{path}' was written for a different set "
+                    "of queries or --all setting."
+                )
+            self.queries = state.get("queries", {})
+
+    def offset(self, index: int) -> int:
+        """Returns the offset of the next page to fetch for query `index`."""
+        return self.queries.get(str(index), {}).get("offset", 0)
+
+    def is_done(self, index: int) -> bool:
+        """Returns whether query `index` has been fetched completely."""
+        return self.queries.get(str(index), {}).get("done", False)
+
+    def has_progress(self) -> bool:
+        """Returns whether any page has been recorded."""
+        return any(query.get("offset", 0) for query in self.queries.values())
+
+    def update(self, index: int, offset: int, done: bool):
+        """
+        Records the progress of query `index` and saves the checkpoint.
+
+        Args:
+            index: The query index.
+            offset: The offset of the next page to fetch.
+            done: Whether the query has been fetched completely.
+        """
+        with self._lock:
+            self.queries[str(index)] = {"offset": offset, "done": done}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"fingerprint": self.fingerprint, "queries": self.queries}, file
+                )
+            os.replace(tmp_path, self.path)
+
+
+class ResultWriter:
+    """
+    Writes records as JSON lines, either to one stream or to one file per query.
+
+    Each record is tagged with the index of the query that produced it.
+    Writes are serialized so records from different workers never interleave.
+    """
+
+    def __init__(
+        self, stream: Optional[TextIO] = None, output_dir: Optional[str] = None
+    ):
+        """
+        Initializes the writer.
+
+        Args:
+            stream: Stream receiving the records of all queries.
+            output_dir: Directory receiving a `query-NNNNN.jsonl` file per
+                query. Takes precedence over `stream`.
+        """
+        self.stream = stream
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+
+    def _path(self, index: int) -> str:
+        return os.path.join(str(self.output_dir), f"query-{index:05d}.jsonl")
+
+    def reset(self, index: int):
+        """Truncates the output of query `index` before it is fetched afresh."""
+        if self.output_dir:
+            with open(self._path(index), "w", encoding="utf-8"):
+                pass
+
+    def write(self, index: int, records: List[Dict[str, Any]]):
+        """
+        Writes a page of records for query `index` and flushes them.
+
+        Args:
+            index: The query index.
+            records: The records of the page.
+        """
+        lines = "".join(
+            json.dumps({"QueryIndex": index, **record}) + "\n" for record in records
+        )
+        with self._lock:
+            if self.output_dir:
+                with open(self._path(index), "a", encoding="utf-8") as file:
+                    file.write(lines)
+            elif self.stream:
+                self.stream.write(lines)
+                self.stream.flush()
+
+
+def run_query(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    tool: NTSBSearchTool,
+    index: int,
+    spec: Dict[str, Any],
+    writer: ResultWriter,
+    checkpoint: Optional[Checkpoint] = None,
+    page_size: int = NTSBSearchTool.MAX_PAGE_SIZE,
+    fetch_all: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> bool:
+    """
+    Fetches every page of one query and writes its records.
+
+    Pages are requested until `max_results` records have been fetched (or
+    until the API runs out of results when `fetch_all` is set). Progress is
+    checkpointed after each page is written, so a page may be written twice
+    if the process dies in between, but none is ever skipped.
+
+    Args:
+        tool: The tool used to query the API.
+        index: The query index, used for output and checkpointing.
+        spec: The query specification.
+        writer: Destination of the records.
+        checkpoint: Optional progress store to resume from and update.
+        page_size: Number of records to request per page.
+        fetch_all: Whether to ignore `max_results` and fetch every result.
+        stop: Optional event that, when set, stops the query between pages.
+
+    Returns:
+        True if the query completed, False if it failed or was stopped.
+    """
+    if checkpoint and checkpoint.is_done(index):
+        return True
+
+    try:
+        params = parse_spec(spec)
+        limit = None
+        if not fetch_all:
+            limit = params.max_results if params.max_results > 0 else 10
+        return _fetch_pages(
+            tool, index, params, writer, checkpoint, page_size, limit, stop
+        )
+    except (ValueError, RuntimeError, httpx.HTTPError) as e:
+        print(f"Query {index}: {e}", file=sys.stderr)
+    except OSError as e:
+        # The output or checkpoint can no longer be written: stop the whole run
+        print(f"Query {index}: Error: Could not save results. {e}", file=sys.stderr)
+        if stop:
+            stop.set()
+    return False
+
+
+def _fetch_pages(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    tool: NTSBSearchTool,
+    index: int,
+    params: NTSBSearchModel,
+    writer: ResultWriter,
+    checkpoint: Optional[Checkpoint],
+    page_size: int,
+    limit: Optional[int],
+    stop: Optional[threading.Event],
+) -> bool:
+    """
+    Runs the page loop of `run_query`, starting from the checkpointed offset.
+
+    Returns:
+        True if the query completed, False if it was stopped.
+    """
+    offset = checkpoint.offset(index) if checkpoint else 0
+    if offset == 0:
+        writer.reset(index)
+
+    while not (stop and stop.is_set()):
+        size = page_size if limit is None else min(page_size, limit - offset)
+        total, records = tool.search_page(params, offset, size)
+        writer.write(index, records)
+        offset += len(records)
+        done = not records or offset >= total or (limit is not None and offset >= limit)
+        if checkpoint:
+            checkpoint.update(index, offset, done)
+        if done:
+            return True
+    return False
+
+
+def run_queries(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    tool: NTSBSearchTool,
+    specs: List[Dict[str, Any]],
+    writer: ResultWriter,
+    checkpoint: Optional[Checkpoint] = None,
+    workers: int = 1,
+    page_size: int = NTSBSearchTool.MAX_PAGE_SIZE,
+    fetch_all: bool = False,
+) -> int:
+    """
+    Runs all queries with a pool of worker threads.
+
+    On KeyboardInterrupt, or when results can no longer be saved, pending
+    queries are cancelled and running ones stop after their current page,
+    leaving the checkpoint ready for a resume.
+
+    Args:
+        tool: The tool used to query the API (its session is shared).
+        specs: The query specifications.
+        writer: Destination of the records.
+        checkpoint: Optional progress store to resume from and update.
+        workers: Number of queries fetched concurrently.
+        page_size: Number of records to request per page.
+        fetch_all: Whether to ignore `max_results` and fetch every result.
+
+    Returns:
+        The number of queries that did not complete.
+    """
+    stop = threading.Event()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+    try:
+        futures = [
+            executor.submit(
+                run_query,
+                tool,
+                index,
+                spec,
+                writer,
+                checkpoint,
+                page_size,
+                fetch_all,
+                stop,
+            )
+            for index, spec in enumerate(specs)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            if stop.is_set():
+                # A query could not save its results; cancel the pending ones
+                break
+    except KeyboardInterrupt:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True, cancel_futures=True)
+    completed = sum(future.result() for future in futures if not future.cancelled())
+    return len(specs) - completed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command-line parser.
+
+    A flag is generated for every `NTSBSearchModel` field (e.g.,
+    `--start-date`), so new search criteria are picked up automatically.
+
+    Returns:
+        The argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="ntsb-query",
+        description=(
+            "Run one or many NTSB CAROL queries and stream the matching records "
+            "as JSON lines."
+        ),
+    )
+    parser.add_argument(
+        "-q",
+        "--queries",
+        metavar="FILE",
+        help=(
+            "JSONL file of query specifications (NTSBSearchModel fields), or '-' "
+            "for stdin. Search flags are ignored when given."
+        ),
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE", help="Write all records to FILE."
+    )
+    parser.add_argument(
+        "--output-dir",
+        metavar="DIR",
+        help="Write the records of each query to DIR/query-NNNNN.jsonl.",
+    )
+    parser.add_argument(
+        "-c",
+        "--checkpoint",
+        metavar="FILE",
+        help="Save progress to FILE and resume from it if it exists.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of queries fetched concurrently. Default is 4.",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=NTSBSearchTool.MAX_PAGE_SIZE,
+        help=(
+            "Records requested per page. Default and maximum is "
+            f"{NTSBSearchTool.MAX_PAGE_SIZE}."
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        help=(
+            "SQLite file caching the API session and query results, shared "
+            "with other processes."
+        ),
+    )
+    parser.add_argument(
+        "--all",
+        dest="fetch_all",
+        action="store_true",
+        help="Fetch every matching record, ignoring max_results.",
+    )
+
+    search = parser.add_argument_group("search criteria")
+    for name, field in NTSBSearchModel.model_fields.items():
+        search.add_argument(
+            "--" + name.replace("_", "-"),
+            dest=name,
+            type=field.annotation if field.annotation in (int, str) else str,
+            help=field.description,
+        )
+    return parser
+
+
+def _read_specs(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Reads the query specifications from --queries, or builds one from flags.
+
+    Raises:
+        OSError: If the queries file cannot be read.
+        ValueError: If the queries file is not valid JSONL.
+    """
+    if args.queries == "-":
+        return load_specs(sys.stdin)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as file:
+            return load_specs(file)
+    return [
+        {
+            name: getattr(args, name)
+            for name in NTSBSearchModel.model_fields.keys()
+            if getattr(args, name) is not None
+        }
+    ]
+
+
+def _open_writer(
+    args: argparse.Namespace, checkpoint: Optional[Checkpoint]
+) -> Tuple[ResultWriter, Optional[TextIO]]:
+    """
+    Creates the writer selected by --output-dir, --output, or stdout.
+
+    A resumed run appends to --output instead of truncating it.
+
+    Returns:
+        The writer and the file it owns (to close after the run), if any.
+
+    Raises:
+        OSError: If the output cannot be created.
+    """
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        return ResultWriter(output_dir=args.output_dir), None
+    if args.output:
+        resuming = checkpoint is not None and checkpoint.has_progress()
+        # pylint: disable-next=consider-using-with
+        output_file = open(args.output, "a" if resuming else "w", encoding="utf-8")
+        return ResultWriter(stream=output_file), output_file
+    return ResultWriter(stream=sys.stdout), None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `ntsb-query` console script.
+
+    Args:
+        argv: Command-line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        The process exit status: 0 if all queries completed, 1 otherwise.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.page_size <= 0:
+        parser.error("--page-size must be positive")
+
+    try:
+        specs = _read_specs(args)
+        checkpoint = (
+            Checkpoint(args.checkpoint, specs, args.fetch_all)
+            if args.checkpoint
+            else None
+        )
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    tool = NTSBSearchTool(cache_path=args.cache)
+    if not tool.session_id:
+        print(
+            "Error: NTSB API session not established. Tool cannot function.",
+            file=sys.stderr,
+        )
+        return 1
+
+    try:
+        writer, output_file = _open_writer(args, checkpoint)
+    except OSError as e:
+        print(f"Error: Could not open output. {e}", file=sys.stderr)
+        return 1
+
+    try:
+        failed = run_queries(
+            tool,
+            specs,
+            writer,
+            checkpoint=checkpoint,
+            workers=args.workers,
+            page_size=args.page_size,
+            fetch_all=args.fetch_all,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+        return 130
+    finally:
+        if output_file:
+            output_file.close()
+
+    if failed:
+        print(f"{failed} of {len(specs)} queries did not complete.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
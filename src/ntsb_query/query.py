@@ -7,11 +7,16 @@ the main tool class (`NTSBSearchTool`) for interacting with the NTSB API.
 
 import datetime
 import json
-from typing import Any, Dict, Generator, List, Optional, Type
+import sqlite3
+import sys
+import threading
+from typing import Any, ClassVar, Dict, Generator, List, Optional, Tuple, Type
 
 import httpx
 from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .store import SharedStore
 
 
 # Define the input schema for the tool
@@ -47,6 +52,26 @@ class NTSBSearchModel(BaseModel):
     aircraft_model: Optional[str] = Field(
         None, description="Aircraft model. e.g., '737'"
     )
+    injury_severity: Optional[str] = Field(
+        None,
+        description=(
+            "Comma-separated highest injury levels; any of them matches. "
+            "e.g., 'Fatal,Serious'"
+        ),
+    )
+    registration_number: Optional[str] = Field(
+        None,
+        description=(
+            "Aircraft registration number, or part of it. e.g., 'N12345' or 'N123'"
+        ),
+    )
+    ntsb_number: Optional[str] = Field(
+        None,
+        description=(
+            "Comma-separated NTSB case numbers; any of them matches. "
+            "e.g., 'WPR23LA001'"
+        ),
+    )
     max_results: int = Field(
         default=10,
         description=(
@@ -63,7 +88,9 @@ class NTSBSearchTool(BaseTool):
     for accident and incident records.
 
     It allows searching based on various criteria such as date range, location,
-    investigation mode, aircraft details, and narrative keywords.
+    investigation mode, aircraft details, injury severity, and narrative keywords.
+    Filters are applied server-side; `FILTER_FIELDS` registers which model
+    fields map to which API columns and operators.
     The tool handles session creation with the API and formats the query
     according to the API's requirements.
     """
@@ -71,6 +98,9 @@ class NTSBSearchTool(BaseTool):
     API_BASE: str = "https://data.ntsb.gov/carol-main-public/api"
     QUERY_URL: str = API_BASE + "/Query/Main"
     SESSION_URL: str = API_BASE + "/Session/CreateSession"
+    MAX_PAGE_SIZE: ClassVar[int] = 50  # The API caps the result set size per request
+    # Query response statuses meaning the session expired or was revoked
+    SESSION_REJECTED_STATUSES: ClassVar[Tuple[int, ...]] = (401, 403)
 
     STATE_ABBREVIATIONS: Dict[str, str] = {
         "alabama": "AL",
@@ -181,48 +211,180 @@ class NTSBSearchTool(BaseTool):
             "InputType": "Text",
             "UnderDevelopment": False,
         },
+        "Event.HighestInjuryLevel": {
+            "FieldName": "HighestInjuryLevel",
+            "DisplayText": "Highest injury level",
+            "InputType": "Dropdown",
+            "UnderDevelopment": False,
+        },
+        "Event.NtsbNo": {
+            "FieldName": "NtsbNo",
+            "DisplayText": "NTSB number",
+            "InputType": "Text",
+            "UnderDevelopment": False,
+        },
+        "Event.N#": {
+            "FieldName": "N#",
+            "DisplayText": "Registration number",
+            "InputType": "Text",
+            "UnderDevelopment": False,
+        },
+    }
+    # Model fields filtered server-side: field name -> (API column, operator).
+    # Columns are "Event." plus a result column name of the API (see
+    # examples/), like the City, State and VehicleMake filters above.
+    # "is" and "contains" map to a single rule, and "in-list" takes
+    # comma-separated values (any of).
+    FILTER_FIELDS: Dict[str, Tuple[str, str]] = {
+        "city": ("Event.City", "is"),
+        "aircraft_make": ("Event.VehicleMake", "is"),
+        "aircraft_model": ("Event.VehicleModel", "is"),
+        "injury_severity": ("Event.HighestInjuryLevel", "in-list"),
+        "registration_number": ("Event.N#", "contains"),
+        "ntsb_number": ("Event.NtsbNo", "in-list"),
     }
 
     name: str = "NTSB Accident Search Tool"
     description: str = (
         "Queries the NTSB CAROL database for accident records. Searches by date "
-        "range, location, investigation mode, aircraft details, and narrative "
-        "keywords. Returns a summary of findings and a list of matching "
-        "accident records in JSON format."
+        "range, location, investigation mode, aircraft details, injury severity, "
+        "registration or NTSB number, and narrative keywords. Returns a summary "
+        "of findings and a list of matching accident records in JSON format."
     )
     args_schema: Type[BaseModel] = NTSBSearchModel
     session_id: Optional[str] = None  # Instance variable for session ID
+    # SQLite file holding the session and query results shared across processes
+    cache_path: Optional[str] = None
+    session_ttl: float = 1800.0  # Seconds a shared session is reused
+    result_ttl: float = 3600.0  # Seconds a cached query result is reused
+    _store: Optional[SharedStore] = PrivateAttr(default=None)
+    _session_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     def __init__(self, **kwargs: Any):
         """
         Initializes the NTSBSearchTool.
 
-        Calls the parent BaseTool's initializer and then creates a session
-        with the NTSB API.
+        Calls the parent BaseTool's initializer, opens the shared store if
+        `cache_path` is set, and then creates (or reuses) a session with the
+        NTSB API.
         """
         super().__init__(**kwargs)  # Call BaseTool's __init__
+        if self.cache_path:
+            try:
+                self._store = SharedStore(self.cache_path)
+            except sqlite3.Error as e:
+                # The tool still works without the shared store, just uncached
+                self._warn_store_error(e)
         self._create_session()
 
+    def _warn_store_error(self, error: sqlite3.Error):
+        """
+        Reports a shared store failure, which is otherwise treated as a miss.
+
+        Args:
+            error: The SQLite error raised by the shared store.
+        """
+        print(
+            f"Warning: Shared cache '{self.cache_path}' unavailable: {error}",
+            file=sys.stderr,
+        )
+
+    def _request_session(self) -> str:
+        """
+        Requests a new session ID from the NTSB CAROL API.
+
+        Returns:
+            The new session ID.
+
+        Raises:
+            httpx.HTTPError: If the API request fails.
+        """
+        response = httpx.post(self.SESSION_URL, timeout=10)
+        response.raise_for_status()
+        # Optional: for logging/debugging (stderr keeps stdout for results)
+        print(f"NTSB API Session created: {response.text}", file=sys.stderr)
+        return response.text
+
     def _create_session(self):
         """
         Creates a new session with the NTSB CAROL API.
 
+        With a shared store, the session of another process is reused until it
+        expires, and only one process creates its replacement.
+
+        If the shared store fails, the current session is kept, or a private
+        one is created.
+
         Stores the session ID in `self.session_id`. If session creation fails,
         `self.session_id` will be None.
         """
         try:
-            response = httpx.post(self.SESSION_URL, timeout=10)
-            response.raise_for_status()
-            self.session_id = response.text
-            # Optional: for logging/debugging
-            print(f"NTSB API Session created: {self.session_id}")
-        except httpx.RequestError as e:
+            shared_id = self._shared_session()
+            self.session_id = shared_id or self.session_id or self._request_session()
+        except httpx.HTTPError as e:
             self.session_id = None  # Ensure session_id is None on failure
             # Optional: for logging/debugging
-            print(f"Error creating NTSB API session: {e}")
+            print(f"Error creating NTSB API session: {e}", file=sys.stderr)
             # Depending on desired behavior, you might want to raise an exception here
             # or handle it more gracefully in _run.
 
+    def _shared_session(self) -> Optional[str]:
+        """
+        Gets (or creates) the session shared through the store.
+
+        Returns:
+            The shared session ID, or None without a usable shared store.
+
+        Raises:
+            httpx.HTTPError: If a new session is needed and its creation fails.
+        """
+        if not self._store:
+            return None
+        try:
+            return self._store.get_or_create_session(
+                self._request_session, self.session_ttl
+            )
+        except sqlite3.Error as e:
+            self._warn_store_error(e)
+            return None
+
+    def _refresh_session(self):
+        """
+        Picks up the shared session, renewed by any process once expired.
+
+        Without a shared store, the session is kept until the API rejects it.
+        """
+        if self._store:
+            self._create_session()
+
+    def _renew_session(self, rejected_id: str):
+        """
+        Replaces a session the API rejected.
+
+        Renewal is serialized, and skipped if another thread has already
+        replaced `rejected_id`, so worker threads sharing this tool create a
+        single new session. The rejected session is removed from the shared
+        store, so other processes stop using it instead of waiting for
+        `session_ttl`. `self.session_id` keeps the old value until the new one
+        exists, and is left unchanged if renewal fails.
+
+        Args:
+            rejected_id: The session ID the API rejected.
+        """
+        with self._session_lock:
+            if self.session_id != rejected_id:
+                return  # Already renewed by another thread
+            if self._store:
+                try:
+                    self._store.invalidate_session(rejected_id)
+                except sqlite3.Error as e:
+                    self._warn_store_error(e)
+            try:
+                # The rejected ID must not be kept as a fallback here
+                self.session_id = self._shared_session() or self._request_session()
+            except httpx.HTTPError as e:
+                print(f"Error renewing NTSB API session: {e}", file=sys.stderr)
+
     def _create_query_rule(
         self, columns_list: List[str], operator: str, rule_values: List[str]
     ) -> Dict[str, Any]:
@@ -244,7 +406,8 @@ class NTSBSearchTool(BaseTool):
             # This case should ideally be avoided by having all queryable fields in templates
             print(
                 f"Warning: Using generic selectedOption for {column_key}. "
-                "API compatibility not guaranteed."
+                "API compatibility not guaranteed.",
+                file=sys.stderr,
             )
             selected_option_details = {
                 "FieldName": column_key.split(".")[-1],
@@ -308,6 +471,47 @@ class NTSBSearchTool(BaseTool):
                 "editedSinceLastSearch": False,
             }
 
+    def _filter_groups(
+        self, params: NTSBSearchModel
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Constructs query groups for the filter fields in FILTER_FIELDS.
+
+        An "in-list" field with several values forms an OR-group; every other
+        set field forms a single-rule AND-group.
+
+        Args:
+            params: The search parameters model.
+
+        Yields:
+            group dictionaries for each set filter field.
+
+        Raises:
+            ValueError: If an "in-list" field has no values.
+        """
+        for param_name, (column, operator) in self.FILTER_FIELDS.items():
+            value = getattr(params, param_name)
+            if not value:
+                continue
+            if operator == "in-list":
+                items = [item.strip() for item in value.split(",") if item.strip()]
+                if not items:
+                    raise ValueError(
+                        f"Error: Invalid {param_name} '{value}'. "
+                        "Please use comma-separated values."
+                    )
+                rules = [
+                    self._create_query_rule([column], "is", [item]) for item in items
+                ]
+            else:
+                rules = [self._create_query_rule([column], operator, [str(value)])]
+            yield {
+                "QueryRules": rules,
+                "AndOr": "and" if len(rules) == 1 else "or",
+                "inLastSearch": False,
+                "editedSinceLastSearch": False,
+            }
+
     def _build_query_groups(self, params: NTSBSearchModel) -> List[Dict[str, Any]]:
         """
         Constructs the list of query groups for the NTSB API query.
@@ -360,19 +564,13 @@ class NTSBSearchTool(BaseTool):
                     "Error: Invalid end_date format. Please use MM/DD/YYYY."
                 ) from exc
 
-        # Configuration for simple "is" filter rules
-        simple_field_configs = [
-            ("city", ["Event.City"]),
-            ("aircraft_make", ["Event.VehicleMake"]),
-            ("aircraft_model", ["Event.VehicleModel"]),
-        ]
-
-        for param_name, api_columns in simple_field_configs:
-            value = getattr(params, param_name)
-            if value:
-                main_filter_rules.append(
-                    self._create_query_rule(api_columns, "is", [str(value)])
-                )
+        # Registered filter rules ("in-list" with several values forms an OR-group)
+        or_groups: List[Dict[str, Any]] = []
+        for group in self._filter_groups(params):
+            if group["AndOr"] == "and":
+                main_filter_rules.extend(group["QueryRules"])
+            else:
+                or_groups.append(group)
 
         # State rule (special handling for abbreviation)
         if params.state:
@@ -397,6 +595,7 @@ class NTSBSearchTool(BaseTool):
                     "editedSinceLastSearch": False,
                 }
             )
+        query_groups.extend(or_groups)
 
         # Narrative keywords rules (each keyword forms its own OR-group)
         if params.narrative_keywords:
@@ -405,51 +604,178 @@ class NTSBSearchTool(BaseTool):
 
         return query_groups
 
-    def _compose_output(self, response: httpx.Response) -> str:
+    def _simplify_results(
+        self, api_response_json: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Flattens the records of an API response into simple dictionaries.
+
+        Args:
+            api_response_json: The decoded JSON body of an NTSB API response.
+
+        Returns:
+            A list of records mapping field names to their value(s).
+        """
+        simplified_results = []
+        for res in api_response_json.get("Results", []):
+            record: Dict[str, Any] = {
+                "NTSBEntryId": res.get("EntryId")
+            }  # Renamed for clarity
+            for field in res.get("Fields", []):
+                if field.get("Values") and len(field["Values"]) > 0:
+                    record[field["FieldName"]] = (
+                        field["Values"][0]
+                        if len(field["Values"]) == 1
+                        else field["Values"]
+                    )
+            simplified_results.append(record)
+        return simplified_results
+
+    def _compose_output(self, api_response_json: Dict[str, Any]) -> str:
         """
         Composes the output string from the API response.
 
         Args:
-            response: The HTTP response object from the NTSB API.
+            api_response_json: The decoded JSON body of the NTSB API response.
 
         Returns:
             A formatted string containing the total count, displayed count,
             and a JSON representation of the results.
         """
-        try:
-            api_response_json = response.json()
-
-            results_list = api_response_json.get("Results", [])
-            count = api_response_json.get("ResultListCount", 0)
-
-            if results_list:
-                simplified_results = []
-                for res in results_list:
-                    record: Dict[str, Any] = {
-                        "NTSBEntryId": res.get("EntryId")
-                    }  # Renamed for clarity
-                    for field in res.get("Fields", []):
-                        if field.get("Values") and len(field["Values"]) > 0:
-                            record[field["FieldName"]] = (
-                                field["Values"][0]
-                                if len(field["Values"]) == 1
-                                else field["Values"]
-                            )
-                    simplified_results.append(record)
-                output = (
-                    f"Found {count} total results. Displaying "
-                    f"{len(simplified_results)}: "
-                    f"{json.dumps(simplified_results, indent=2)}"
-                )
-            else:
-                output = f"No results found. (Total count reported by API: {count})"
-        except json.JSONDecodeError:
+        simplified_results = self._simplify_results(api_response_json)
+        count = api_response_json.get("ResultListCount", 0)
+
+        if simplified_results:
             output = (
-                "Error: Could not decode JSON response from API. "
-                f"Response text: {response.text()}"
+                f"Found {count} total results. Displaying "
+                f"{len(simplified_results)}: "
+                f"{json.dumps(simplified_results, indent=2)}"
             )
+        else:
+            output = f"No results found. (Total count reported by API: {count})"
         return output
 
+    def _build_payload(
+        self, params: NTSBSearchModel, offset: int = 0, page_size: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Constructs the request body for the NTSB API query endpoint.
+
+        Args:
+            params: The search parameters model.
+            offset: Number of records to skip (for pagination).
+            page_size: Number of records to request. If not positive, it is
+                derived from `params.max_results`.
+
+        Returns:
+            The payload dictionary to post to `QUERY_URL`.
+
+        Raises:
+            ValueError: If the search parameters are invalid.
+        """
+        if page_size <= 0:
+            page_size = params.max_results if params.max_results > 0 else 10
+
+        return {
+            "ResultSetSize": min(page_size, self.MAX_PAGE_SIZE),
+            "ResultSetOffset": offset,
+            "QueryGroups": self._build_query_groups(params),
+            "AndOr": "and",  # How different QueryGroups are combined
+            "SortColumn": "Event.EventDate",  # Default sort
+            "SortDescending": True,
+            "TargetCollection": "cases",
+            "SessionId": self.session_id,  # Use the fetched session ID
+        }
+
+    def _post_query(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Posts a query to the NTSB API and decodes the response.
+
+        With a shared store, a fresh cached response for the same payload
+        (regardless of session) is returned without calling the API, and new
+        responses are cached for other processes. Shared store failures are
+        treated as cache misses.
+
+        If the API rejects the session, it is invalidated (for every process,
+        with a shared store), renewed, and the query is retried once.
+
+        Args:
+            payload: The request body, from `_build_payload`.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            httpx.HTTPError: If the API request fails.
+            json.JSONDecodeError: If the response is not valid JSON.
+        """
+        key = None
+        if self._store:
+            key = SharedStore.payload_key(payload)
+            try:
+                cached = self._store.get_result(key)
+            except sqlite3.Error as e:
+                self._warn_store_error(e)
+                cached = None
+            if cached is not None:
+                return cached
+
+        response = httpx.post(self.QUERY_URL, json=payload, timeout=30)
+        if response.status_code in self.SESSION_REJECTED_STATUSES:
+            self._renew_session(payload["SessionId"])
+            if self.session_id != payload["SessionId"]:
+                payload = {**payload, "SessionId": self.session_id}
+                response = httpx.post(self.QUERY_URL, json=payload, timeout=30)
+        # Raises HTTPStatusError for bad responses (4XX or 5XX)
+        response.raise_for_status()
+        api_response_json = response.json()
+
+        if key:
+            try:
+                self._store.put_result(key, api_response_json, self.result_ttl)
+            except sqlite3.Error as e:
+                self._warn_store_error(e)
+        return api_response_json
+
+    def search_page(
+        self, params: NTSBSearchModel, offset: int = 0, page_size: int = 0
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Fetches a single page of results for the given search parameters.
+
+        Unlike `_run`, errors are raised rather than formatted into the
+        output, so callers (e.g., the bulk runner) can decide how to
+        recover.
+
+        Args:
+            params: The search parameters model.
+            offset: Number of records to skip (for pagination).
+            page_size: Number of records to request (capped at
+                `MAX_PAGE_SIZE`). Defaults to `params.max_results`.
+
+        Returns:
+            A tuple of the total count reported by the API and the list of
+            simplified records in this page.
+
+        Raises:
+            RuntimeError: If no NTSB API session is established.
+            ValueError: If the search parameters are invalid or the response
+                        is not valid JSON.
+            httpx.HTTPError: If the API request fails.
+        """
+        self._refresh_session()
+        if not self.session_id:
+            raise RuntimeError(
+                "Error: NTSB API session not established. Tool cannot function."
+            )
+
+        payload = self._build_payload(params, offset, page_size)
+        api_response_json = self._post_query(payload)
+        return (
+            api_response_json.get("ResultListCount", 0),
+            self._simplify_results(api_response_json),
+        )
+
     def _run(self, *args: Any, **kwargs: Any) -> str:
         """
         Executes the NTSB query with the provided parameters.
@@ -462,6 +788,7 @@ class NTSBSearchTool(BaseTool):
             A string containing either the search results in JSON format or
             an error message.
         """
+        self._refresh_session()
         if not self.session_id:
             return "Error: NTSB API session not established. Tool cannot function."
 
@@ -473,36 +800,25 @@ class NTSBSearchTool(BaseTool):
         try:
             # Pydantic validation happens here on instantiation
             params = NTSBSearchModel(**kwargs)
-            # _build_query_groups can now raise ValueError for specific
+            # _build_payload can now raise ValueError for specific
             # input issues
-            query_groups = self._build_query_groups(params)
+            payload = self._build_payload(params)
         except ValueError as e:
             # Catch validation errors from _build_query_groups (e.g., bad date/state)
             # or Pydantic validation errors if they were to occur here.
             return str(e)
 
-        payload: Dict[str, Any] = {
-            "ResultSetSize": (
-                min(params.max_results, 50) if params.max_results > 0 else 10
-            ),
-            "ResultSetOffset": 0,
-            "QueryGroups": query_groups,
-            "AndOr": "and",  # How different QueryGroups are combined
-            "SortColumn": "Event.EventDate",  # Default sort
-            "SortDescending": True,
-            "TargetCollection": "cases",
-            "SessionId": self.session_id,  # Use the fetched session ID
-        }
-
         try:
-            response = httpx.post(self.QUERY_URL, json=payload, timeout=30)
-            # Raises HTTPStatusError for bad responses (4XX or 5XX)
-            response.raise_for_status()
-            output = self._compose_output(response)
+            output = self._compose_output(self._post_query(payload))
+        except json.JSONDecodeError as e:
+            output = (
+                "Error: Could not decode JSON response from API. "
+                f"Response text: {e.doc}"
+            )
         except httpx.HTTPStatusError as e:
             output = (
                 f"Error: API request failed with status {e.response.status_code}. "
-                f"Response: {response.text}"
+                f"Response: {e.response.text}"
             )
         except httpx.RequestError as e:  # Catches DNS, Connection, Timeout errors
             output = f"Error: API request failed. {str(e)}"
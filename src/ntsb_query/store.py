@@ -0,0 +1,170 @@
+"""
+Provides a disk-backed store shared by all processes using the NTSB Query Tool.
+
+`SharedStore` keeps the active NTSB API session ID and cached query results in
+a SQLite database, so that many worker processes (e.g., gunicorn or celery
+workers) reuse one session and each other's results instead of each creating
+its own session and repeating the same queries.
+"""
+
+import contextlib
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class SharedStore:
+    """
+    A SQLite-backed store for the API session and query results.
+
+    SQLite's file locking makes the store safe to use from several processes
+    and threads. A new connection is opened for every operation, so instances
+    can be created before workers fork.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """
+        Opens the store at `path`, creating its tables if needed.
+
+        Args:
+            path: Location of the SQLite database file.
+            timeout: Seconds to wait for another process to release a lock.
+        """
+        self.path = path
+        self.timeout = timeout
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session "
+                "(id INTEGER PRIMARY KEY CHECK (id = 1), "
+                "session_id TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Keeps pruning expired results in put_result from scanning the table
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a connection in autocommit mode (transactions are explicit)."""
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_session(self) -> Optional[str]:
+        """
+        Returns the shared session ID, or None if there is none or it expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT session_id FROM session WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_or_create_session(self, create: Callable[[], str], ttl: float) -> str:
+        """
+        Returns the shared session ID, creating one if there is none.
+
+        Creation happens while holding the database write lock, so concurrent
+        callers wait for the first one instead of creating sessions of their
+        own.
+
+        Args:
+            create: Function requesting a new session ID from the API.
+            ttl: Seconds a newly created session is considered valid.
+
+        Returns:
+            The shared session ID.
+        """
+        session_id = self.get_session()
+        if session_id:
+            return session_id
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT session_id FROM session WHERE expires_at > ?",
+                    (time.time(),),
+                ).fetchone()
+                if row:
+                    session_id = row[0]
+                else:
+                    session_id = create()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO session VALUES (1, ?, ?)",
+                        (session_id, time.time() + ttl),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return session_id
+
+    def invalidate_session(self, session_id: str):
+        """
+        Discards the shared session if it is still `session_id`.
+
+        Used when the API rejects a session before it expires. A session that
+        another process has already renewed is left untouched.
+
+        Args:
+            session_id: The rejected session ID.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM session WHERE session_id = ?", (session_id,))
+
+    @staticmethod
+    def payload_key(payload: Dict[str, Any]) -> str:
+        """
+        Computes the cache key of a query payload.
+
+        The key is a hash of the canonical JSON of the payload without its
+        session ID, so identical queries share a key across sessions.
+
+        Args:
+            payload: The request body of an NTSB API query.
+
+        Returns:
+            The cache key.
+        """
+        canonical = {k: v for k, v in payload.items() if k != "SessionId"}
+        return hashlib.sha256(
+            json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached API response for `key`, or None if missing or expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM results WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_result(self, key: str, value: Dict[str, Any], ttl: float):
+        """
+        Caches an API response and drops expired ones.
+
+        Args:
+            key: The cache key, from `payload_key`.
+            value: The decoded JSON response.
+            ttl: Seconds the response is considered fresh.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
@@ -0,0 +1,79 @@
+"""
+Shared fixtures for tests that mock the NTSB API instead of calling it.
+"""
+
+import threading
+from json import dumps
+
+import httpx
+import pytest
+
+
+class FakeAPI:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    Stands in for `httpx.post`, serving sessions and `total` numbered records.
+
+    `session_status` and `query_statuses` set the HTTP status of the next
+    responses (queries pop one status per call and default to 200). Queries
+    with a session in `expired_sessions`, or any but the newest session when
+    `only_newest_session` is set, get a 401.
+    """
+
+    def __init__(self):
+        self.total = 3
+        self.session_status = 200
+        self.query_statuses = []
+        self.expired_sessions = set()
+        self.only_newest_session = False
+        self.sessions = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        """Mimics httpx.post for the session and query endpoints."""
+        del timeout  # Unused
+        request = httpx.Request("POST", url)
+        with self._lock:
+            self.calls.append((url, json))
+            if url.endswith("/Session/CreateSession"):
+                self.sessions += 1
+                return httpx.Response(
+                    self.session_status,
+                    text=f"session-{self.sessions}",
+                    request=request,
+                )
+            status = self.query_statuses.pop(0) if self.query_statuses else 200
+            newest = f"session-{self.sessions}"
+
+        session_id = json["SessionId"]
+        if session_id in self.expired_sessions or (
+            self.only_newest_session and session_id != newest
+        ):
+            status = 401
+        if status != 200:
+            return httpx.Response(status, text="Error", request=request)
+        offset = json["ResultSetOffset"]
+        end = min(offset + json["ResultSetSize"], self.total)
+        body = {
+            "ResultListCount": self.total,
+            "Results": [
+                {
+                    "EntryId": i,
+                    "Fields": [{"FieldName": "NtsbNo", "Values": [f"NTSB-{i}"]}],
+                }
+                for i in range(offset, end)
+            ],
+        }
+        return httpx.Response(200, text=dumps(body), request=request)
+
+    def query_calls(self):
+        """Returns the payloads posted to the query endpoint."""
+        return [payload for url, payload in self.calls if url.endswith("/Query/Main")]
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Replaces `httpx.post` with a FakeAPI for the duration of a test."""
+    api = FakeAPI()
+    monkeypatch.setattr(httpx, "post", api.post)
+    return api
@@ -0,0 +1,231 @@
+"""
+Tests for the ntsb-query bulk runner, using a fake tool instead of the live API.
+"""
+
+import io
+import json
+
+import pytest
+
+from ntsb_query import NTSBSearchModel
+from ntsb_query.cli import (
+    Checkpoint,
+    ResultWriter,
+    build_parser,
+    load_specs,
+    main,
+    run_queries,
+)
+
+
+class FakeTool:  # pylint: disable=too-few-public-methods
+    """Serves `total` numbered records per query and records the calls made."""
+
+    def __init__(self, total: int, fail_at_offset: int = -1):
+        self.total = total
+        self.fail_at_offset = fail_at_offset
+        self.calls = []
+
+    def search_page(self, params, offset=0, page_size=0):
+        """Mimics NTSBSearchTool.search_page."""
+        self.calls.append((params.city, offset, page_size))
+        if offset == self.fail_at_offset:
+            raise RuntimeError("Error: simulated failure")
+        end = min(offset + page_size, self.total)
+        return self.total, [
+            {"NtsbNo": f"{params.city}-{i}"} for i in range(offset, end)
+        ]
+
+
+def read_records(stream: io.StringIO):
+    """Parses the JSON lines written to `stream`."""
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_load_specs():
+    """Tests that JSONL specs are read in order and blank lines are skipped."""
+    specs = load_specs(io.StringIO('{"city": "Dallas"}\n\n{"state": "Texas"}\n'))
+    assert specs == [{"city": "Dallas"}, {"state": "Texas"}]
+
+    with pytest.raises(ValueError):
+        load_specs(io.StringIO("[1, 2]\n"))
+
+
+def test_pagination_respects_max_results():
+    """Tests that pages are fetched until max_results records are written."""
+    tool = FakeTool(total=100)
+    out = io.StringIO()
+    failed = run_queries(
+        tool,
+        [{"city": "Dallas", "max_results": 12}],
+        ResultWriter(stream=out),
+        page_size=5,
+    )
+
+    assert failed == 0
+    assert [call[1:] for call in tool.calls] == [(0, 5), (5, 5), (10, 2)]
+    records = read_records(out)
+    assert len(records) == 12
+    assert all(record["QueryIndex"] == 0 for record in records)
+
+
+def test_fetch_all_stops_at_total():
+    """Tests that fetch_all ignores max_results and stops at the API total."""
+    tool = FakeTool(total=7)
+    out = io.StringIO()
+    failed = run_queries(
+        tool,
+        [{"city": "Dallas"}],
+        ResultWriter(stream=out),
+        page_size=5,
+        fetch_all=True,
+    )
+
+    assert failed == 0
+    assert len(read_records(out)) == 7
+
+
+def test_invalid_spec_is_reported():
+    """Tests that invalid specs fail without stopping the other queries."""
+    out = io.StringIO()
+    specs = [{"city": "Dallas"}, {"unknown_field": "x"}, {}]
+    failed = run_queries(FakeTool(total=3), specs, ResultWriter(stream=out), workers=2)
+
+    assert failed == 2
+    assert len(read_records(out)) == 3
+
+
+def test_checkpoint_resume(tmp_path):
+    """Tests that an interrupted query resumes from its checkpointed offset."""
+    path = str(tmp_path / "checkpoint.json")
+    specs = [
+        {"city": "Dallas", "max_results": 20},
+        {"city": "Austin", "max_results": 3},
+    ]
+
+    first_out = io.StringIO()
+    failed = run_queries(
+        FakeTool(total=100, fail_at_offset=10),
+        specs,
+        ResultWriter(stream=first_out),
+        checkpoint=Checkpoint(path, specs),
+        page_size=5,
+    )
+    assert failed == 1
+
+    tool = FakeTool(total=100)
+    second_out = io.StringIO()
+    failed = run_queries(
+        tool,
+        specs,
+        ResultWriter(stream=second_out),
+        checkpoint=Checkpoint(path, specs),
+        page_size=5,
+    )
+    assert failed == 0
+    # The completed query is skipped and the other one resumes at offset 10
+    assert tool.calls == [("Dallas", 10, 5), ("Dallas", 15, 5)]
+
+    numbers = [r["NtsbNo"] for r in read_records(first_out) + read_records(second_out)]
+    assert sorted(numbers) == sorted(
+        [f"Dallas-{i}" for i in range(20)] + [f"Austin-{i}" for i in range(3)]
+    )
+
+    with pytest.raises(ValueError):
+        Checkpoint(path, [{"city": "Houston"}])
+
+
+def test_main_stdout_is_jsonl(fake_api, capsys):
+    """Tests that stdout carries only records, with log messages on stderr."""
+    assert main(["--city", "Dallas", "--max-results", "5"]) == 0
+
+    captured = capsys.readouterr()
+    lines = captured.out.splitlines()
+    assert len(lines) == fake_api.total
+    assert all(json.loads(line)["QueryIndex"] == 0 for line in lines)
+    assert "NTSB API Session created" in captured.err
+
+
+def test_checkpoint_fetch_all_mismatch(tmp_path):
+    """Tests that a checkpoint cannot be resumed with a different --all setting."""
+    path = str(tmp_path / "checkpoint.json")
+    specs = [{"city": "Dallas"}]
+    Checkpoint(path, specs).update(0, 10, True)
+
+    with pytest.raises(ValueError):
+        Checkpoint(path, specs, fetch_all=True)
+    assert Checkpoint(path, specs).is_done(0)
+
+
+def test_build_parser_flags():
+    """Tests that a flag is generated for every NTSBSearchModel field."""
+    args = build_parser().parse_args(
+        ["--start-date", "01/01/2020", "--max-results", "7", "--all"]
+    )
+
+    for name in NTSBSearchModel.model_fields.keys():
+        assert hasattr(args, name)
+    assert args.start_date == "01/01/2020"
+    assert args.max_results == 7
+    assert args.fetch_all
+
+
+def test_main_output_resume_appends(fake_api, tmp_path):
+    """Tests that a resumed run appends to --output and exit codes report failures."""
+    fake_api.total = 5
+    output = tmp_path / "out.jsonl"
+    argv = [
+        "--city",
+        "Dallas",
+        "--all",
+        "--page-size",
+        "2",
+        "--output",
+        str(output),
+        "--checkpoint",
+        str(tmp_path / "checkpoint.json"),
+    ]
+
+    fake_api.query_statuses = [200, 503]  # Second page fails
+    assert main(argv) == 1
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 2
+
+    assert main(argv) == 0
+    numbers = [
+        json.loads(line)["NtsbNo"]
+        for line in output.read_text(encoding="utf-8").splitlines()
+    ]
+    assert numbers == [f"NTSB-{i}" for i in range(5)]
+
+
+def test_main_usage_errors(tmp_path):
+    """Tests the exit codes of invalid invocations."""
+    assert main(["--queries", str(tmp_path / "missing.jsonl")]) == 1
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--city", "Dallas", "--page-size", "0"])
+    assert exc_info.value.code == 2
+
+
+def test_main_api_and_cache_failures(fake_api, tmp_path, capsys):
+    """Tests that session and cache failures end with an exit code, not a traceback."""
+    assert main(["--city", "Dallas", "--cache", str(tmp_path / "no" / "c.db")]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == fake_api.total
+
+    fake_api.session_status = 503
+    assert main(["--city", "Dallas"]) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_output_failure_stops_run(tmp_path, capsys):
+    """Tests that a write failure stops the run instead of raising."""
+    output_dir = tmp_path / "results"
+    output_dir.mkdir()
+    writer = ResultWriter(output_dir=str(output_dir))
+    output_dir.rmdir()  # Every write now fails with FileNotFoundError
+
+    specs = [{"city": f"City{i}"} for i in range(8)]
+    failed = run_queries(FakeTool(total=3), specs, writer, workers=2)
+
+    assert failed == len(specs)
+    assert "Could not save results" in capsys.readouterr().err
@@ -9,7 +9,7 @@ import time  # Potentially useful for rate limiting between tests
 import pytest
 
 # Assuming ntsbtool.py is in the same directory or accessible in PYTHONPATH
-from ntsb_query import NTSBSearchTool
+from ntsb_query import NTSBSearchModel, NTSBSearchTool
 
 
 @pytest.fixture
@@ -56,6 +56,18 @@ def parse_tool_output(result_str: str):
     return total_count, displayed_count, output_data
 
 
+def check_filter_fields(record, args):
+    """Asserts that a record matches the FILTER_FIELDS criteria in `args`."""
+    if "injury_severity" in args:
+        levels = [lvl.strip() for lvl in args["injury_severity"].split(",")]
+        assert record.get("HighestInjuryLevel") in levels
+    if "ntsb_number" in args:
+        numbers = [num.strip() for num in args["ntsb_number"].split(",")]
+        assert record.get("NtsbNo") in numbers
+    if "registration_number" in args:
+        assert args["registration_number"] in record.get("N#", "")
+
+
 @pytest.mark.parametrize(
     "test_id, args",
     [
@@ -78,6 +90,26 @@ def parse_tool_output(result_str: str):
                 "max_results": 5,
             },
         ),
+        (
+            "injury_severity",
+            {
+                "start_date": "01/01/2023",
+                "end_date": "12/31/2023",
+                "state": "California",
+                "injury_severity": "Fatal, Serious",
+                "max_results": 10,
+            },
+        ),
+        (
+            "ntsb_and_registration_number",
+            {
+                "start_date": "01/01/2023",
+                "end_date": "12/31/2023",
+                "ntsb_number": "WPR23LA116, ERA23LA001",
+                "registration_number": "N9267",
+                "max_results": 5,
+            },
+        ),
     ],
 )
 def test_various_criteria(tool, test_id, args):
@@ -128,6 +160,10 @@ def test_various_criteria(tool, test_id, args):
                     f"Could not parse event_date_str from record for {test_id}: {event_date_str}"
                 )
 
+        # Server-side filters: every returned record must match
+        for record in output_data:
+            check_filter_fields(record, args)
+
         if "narrative_keywords" in args:
             # Note: Verifying narrative_keywords directly is hard as
             # narratives aren't in simplified output.  We rely on the
@@ -202,3 +238,36 @@ def test_no_criteria_error(tool):
     # Test with empty or None values
     result_empty = tool.run(start_date=None, end_date=None, state=None, city=None)
     assert result_empty == "Error: No valid search criteria provided to form a query."
+
+
+def test_invalid_filter_list(tool):
+    """Tests error handling for list filters without values."""
+    result = tool.run(ntsb_number=" , ")
+    assert result == (
+        "Error: Invalid ntsb_number ' , '. Please use comma-separated values."
+    )
+
+
+def test_filter_pushdown_rules(tool):
+    """Tests that registered filters become server-side query rules."""
+    params = NTSBSearchModel(
+        registration_number="N12345",
+        injury_severity="Fatal, Serious",
+        ntsb_number="WPR23LA116",
+    )
+    groups = tool._build_query_groups(params)  # pylint: disable=protected-access
+    main_group, severity_group = groups
+
+    main_rules = [
+        (rule["Columns"], rule["Operator"], rule["Values"])
+        for rule in main_group["QueryRules"]
+    ]
+    assert main_group["AndOr"] == "and"
+    assert (["Event.N#"], "contains", ["N12345"]) in main_rules
+    assert (["Event.NtsbNo"], "is", ["WPR23LA116"]) in main_rules
+
+    assert severity_group["AndOr"] == "or"
+    assert [rule["Values"] for rule in severity_group["QueryRules"]] == [
+        ["Fatal"],
+        ["Serious"],
+    ]
@@ -0,0 +1,139 @@
+"""
+Tests for the SharedStore and its use by the tool, with a mocked API.
+"""
+
+import concurrent.futures
+import time
+
+import pytest
+
+from ntsb_query import NTSBSearchTool
+from ntsb_query.store import SharedStore
+
+
+def test_session_is_shared(tmp_path):
+    """Tests that a session created through one store is reused by another."""
+    path = str(tmp_path / "cache.db")
+    created = []
+
+    def create():
+        created.append(f"session-{len(created)}")
+        return created[-1]
+
+    first = SharedStore(path).get_or_create_session(create, ttl=60)
+    second = SharedStore(path).get_or_create_session(create, ttl=60)
+
+    assert first == second == "session-0"
+    assert created == ["session-0"]
+
+
+def test_session_expires(tmp_path):
+    """Tests that an expired session is replaced by a new one."""
+    store = SharedStore(str(tmp_path / "cache.db"))
+
+    assert store.get_or_create_session(lambda: "old", ttl=0.01) == "old"
+    time.sleep(0.02)
+    assert store.get_session() is None
+    assert store.get_or_create_session(lambda: "new", ttl=60) == "new"
+
+
+def test_result_cache(tmp_path):
+    """Tests that results are keyed by payload regardless of session ID."""
+    store = SharedStore(str(tmp_path / "cache.db"))
+    payload = {"ResultSetSize": 10, "QueryGroups": [], "SessionId": "a"}
+    key = SharedStore.payload_key(payload)
+
+    assert key == SharedStore.payload_key({**payload, "SessionId": "b"})
+    assert key != SharedStore.payload_key({**payload, "ResultSetSize": 20})
+
+    assert store.get_result(key) is None
+    store.put_result(key, {"ResultListCount": 1}, ttl=60)
+    assert store.get_result(key) == {"ResultListCount": 1}
+
+    store.put_result(key, {"ResultListCount": 2}, ttl=0)
+    assert store.get_result(key) is None
+
+
+def test_invalidate_session(tmp_path):
+    """Tests that only the session still holding the rejected ID is discarded."""
+    store = SharedStore(str(tmp_path / "cache.db"))
+    store.get_or_create_session(lambda: "current", ttl=60)
+
+    store.invalidate_session("stale")
+    assert store.get_session() == "current"
+    store.invalidate_session("current")
+    assert store.get_session() is None
+
+
+def test_tool_shares_session_and_results(fake_api, tmp_path):
+    """Tests that tools sharing a cache reuse one session and cached results."""
+    path = str(tmp_path / "cache.db")
+    first = NTSBSearchTool(cache_path=path)
+    second = NTSBSearchTool(cache_path=path)
+    assert first.session_id == second.session_id == "session-1"
+    assert fake_api.sessions == 1
+
+    result = first.run(city="Dallas")
+    assert result.startswith("Found 3 total results.")
+    assert second.run(city="Dallas") == result
+    assert len(fake_api.query_calls()) == 1
+
+
+def test_tool_does_not_cache_errors(fake_api, tmp_path):
+    """Tests that failed responses are not cached."""
+    tool = NTSBSearchTool(cache_path=str(tmp_path / "cache.db"))
+    fake_api.query_statuses = [503]
+
+    assert tool.run(city="Dallas").startswith(
+        "Error: API request failed with status 503"
+    )
+    assert tool.run(city="Dallas").startswith("Found 3 total results.")
+    assert len(fake_api.query_calls()) == 2
+
+
+def test_tool_renews_rejected_session(fake_api, tmp_path):
+    """Tests that a rejected session is invalidated, renewed and retried once."""
+    path = str(tmp_path / "cache.db")
+    tool = NTSBSearchTool(cache_path=path)
+    fake_api.query_statuses = [401]
+
+    assert tool.run(city="Dallas").startswith("Found 3 total results.")
+    assert [call["SessionId"] for call in fake_api.query_calls()] == [
+        "session-1",
+        "session-2",
+    ]
+    assert SharedStore(path).get_session() == "session-2"
+
+
+def test_tool_session_renewal_failure(fake_api, tmp_path):
+    """Tests that a failed session renewal is reported as an error string."""
+    tool = NTSBSearchTool(cache_path=str(tmp_path / "cache.db"), session_ttl=0)
+    fake_api.session_status = 503
+
+    assert (
+        tool.run(city="Dallas")
+        == "Error: NTSB API session not established. Tool cannot function."
+    )
+
+
+def test_tool_without_usable_cache(fake_api, tmp_path):
+    """Tests that an unusable cache path falls back to an uncached tool."""
+    tool = NTSBSearchTool(cache_path=str(tmp_path / "missing" / "cache.db"))
+
+    assert tool.session_id == "session-1"
+    assert tool.run(city="Dallas").startswith("Found 3 total results.")
+
+
+@pytest.mark.parametrize("only_newest_session", [False, True])
+def test_threads_renew_session_once(fake_api, only_newest_session):
+    """Tests that threads sharing a tool replace an expired session only once."""
+    tool = NTSBSearchTool()
+    fake_api.expired_sessions = {"session-1"}
+    fake_api.only_newest_session = only_newest_session
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda i: tool.run(city=f"City{i}"), range(8)))
+
+    assert all(result.startswith("Found 3 total results.") for result in results)
+    assert fake_api.sessions == 2
+    assert tool.session_id == "session-2"